@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 from pptx.chart import chart
 from pptx.chart.data import CategoryChartData, XyChartData
 from pptx.enum.chart import XL_CHART_TYPE
@@ -5,158 +8,257 @@ from pptx.util import Inches
 from pptx.enum.chart import XL_LEGEND_POSITION
 from typing import Literal, Union, List, Dict, Any
 
-class ChartManager:
-    def __init__(self):
-        self.name = "Chart Manager"
-
-    def determine_chart_type(self, data: Dict[str, Any]) -> tuple[XL_CHART_TYPE, str]:
-        """
-        Analyze the data structure and determine the most appropriate chart type.
-        Uses heuristics based on data patterns to select the best visualization.
-        
-        Args:
-            data: Dictionary containing chart data with keys for 'series', 'categories', etc.
-            
-        Returns:
-            tuple: (PowerPoint chart type enum, chart_format string)
-        """
-        # Get basic data properties
-        series_count = len(data["series"])
-        categories = data.get("categories", [])
-        category_count = len(categories) if categories else 0
-        
-        # Validate series data exists
-        if not data["series"] or not all(s.get("values") for s in data["series"]):
-            # Default to column chart if data is missing or incomplete
-            return XL_CHART_TYPE.COLUMN_CLUSTERED, "category"
-
-        # Check for XY scatter data (coordinates)
-        # We look for values that are [x,y] pairs
-        is_xy_data = False
-        for series in data["series"]:
-            values = series.get("values", [])
-            if values:
-                # Check if the first value is a coordinate pair
-                first_value = values[0]
-                is_xy_data = isinstance(first_value, (list, tuple)) and len(first_value) == 2
-                
-                # Verify all values are valid coordinate pairs
-                if is_xy_data:
-                    is_xy_data = all(
-                        isinstance(v, (list, tuple)) and len(v) == 2 and 
-                        all(isinstance(coord, (int, float)) for coord in v)
-                        for v in values if v is not None
-                    )
-                break
-
-        if is_xy_data:
-            return XL_CHART_TYPE.XY_SCATTER, "xy"
-
-        # Check for pie chart conditions:
-        # 1. Single series
-        # 2. Few categories (<=8 for readability)
-        # 3. Values sum to approximately 100 (suggesting percentages)
-        if series_count == 1 and categories and len(categories) <= 8:
-            values = data["series"][0].get("values", [])
+# Terms that suggest category labels describe points in time
+_TIME_TERMS = ("date", "time", "year", "month", "day", "quarter", "q1", "q2", "q3", "q4",
+               "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+
+def _trie_pattern(terms) -> str:
+    """
+    Build a regex matching any of the terms, with common prefixes factored out.
+    Each position in the text then follows a single branch per character,
+    so the cost stays flat as the term list grows.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}  # Marks the end of a term
+
+    def build(node) -> str:
+        if "" in node:
+            # A shorter term ends here, which is enough for a substring match
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+# Substring match of any time term, compiled once instead of scanning term by term.
+# Applied to lowercased text rather than using re.IGNORECASE, whose case folding also
+# matches characters such as "İ" or "ſ" that str.lower() doesn't map onto the terms
+_TIME_RE = re.compile(_trie_pattern(_TIME_TERMS))
+
+# Numeric types accepted as XY coordinates
+_COORD_TYPES = (int, float)
+
+# Category lists longer than this are searched as a single joined string
+_BULK_SCAN_THRESHOLD = 64
+
+
+@lru_cache(maxsize=1024)
+def _is_time_label(label: str) -> bool:
+    """
+    Check whether a category label contains a time-related term.
+    Labels repeat across slides (e.g. "Q1 2024"), so results are cached per label.
+    """
+    return _TIME_RE.search(label.lower()) is not None
+
+
+# Features of the chart data, combined into a single integer key for the decision table
+_XY = 1 << 6                # every value is an [x,y] pair
+_PIE = 1 << 5               # single series of percentages or similar magnitudes over <=8 categories
+_TIME = 1 << 4              # category labels mention dates or periods
+_HAS_CATEGORIES = 1 << 3    # at least one category
+_MANY_CATEGORIES = 1 << 2   # more than 10 categories
+_MULTI_SERIES = 1 << 1      # more than 1 series
+_MANY_SERIES = 1 << 0       # more than 3 series
+
+# Chart selection rules in priority order: (flags that must be set, flags that must be clear, result)
+_CHART_RULES = (
+    (_XY, 0, (XL_CHART_TYPE.XY_SCATTER, "xy")),
+    (_PIE, 0, (XL_CHART_TYPE.PIE, "category")),
+    # For time series data, use line chart
+    (_TIME, 0, (XL_CHART_TYPE.LINE, "category")),
+    # Many categories with few series: use column chart
+    (_HAS_CATEGORIES | _MANY_CATEGORIES, _MULTI_SERIES, (XL_CHART_TYPE.COLUMN_CLUSTERED, "category")),
+    # Many series with few categories: use bar chart (better label readability)
+    (_HAS_CATEGORIES | _MANY_SERIES, _MANY_CATEGORIES, (XL_CHART_TYPE.BAR_CLUSTERED, "category")),
+    # Many categories with multiple series: use line chart (less visual clutter)
+    (_HAS_CATEGORIES | _MANY_CATEGORIES | _MULTI_SERIES, 0, (XL_CHART_TYPE.LINE, "category")),
+    # Default recommendations based on series count
+    (_MULTI_SERIES, 0, (XL_CHART_TYPE.BAR_CLUSTERED, "category")),
+    (0, 0, (XL_CHART_TYPE.COLUMN_CLUSTERED, "category")),
+)
+
+# Every feature combination resolved once, so classification ends in a single lookup
+_CHART_TYPE_TABLE = {
+    flags: next(result for required, forbidden, result in _CHART_RULES
+                if flags & required == required and not flags & forbidden)
+    for flags in range(1 << 7)
+}
+
+
+@lru_cache(maxsize=512)
+def _classify_chart_data(categories: tuple, series_count: int, values: tuple) -> tuple[XL_CHART_TYPE, str]:
+    """
+    Pick the chart type for a hashable snapshot of the chart data.
+    Only the first series' values are inspected, so the other series are reduced to their count.
+
+    Args:
+        categories: Category labels as a tuple (empty if none were given)
+        series_count: Number of series, all of which have values
+        values: Non-empty tuple of the first series' values, with list or tuple values
+            normalized to plain tuples
+
+    Returns:
+        tuple: (PowerPoint chart type enum, chart_format string)
+    """
+    # Get basic data properties
+    category_count = len(categories)
+
+    # Scan the first series once, gathering everything the XY and pie checks need:
+    # whether every value is an [x,y] pair, and running numeric aggregates
+    xy_count = 0
+    value_count = 0
+    is_numeric = True
+    numeric_count = 0
+    total = 0
+    max_val = min_val = None
+    for v in values:
+        if v is None:
+            continue
+        value_count += 1
+        if type(v) is tuple:
+            # Exact type checks first, falling back to isinstance only for subclasses such as bool
+            if len(v) == 2:
+                x, y = v
+                if ((type(x) in _COORD_TYPES or isinstance(x, _COORD_TYPES)) and
+                        (type(y) in _COORD_TYPES or isinstance(y, _COORD_TYPES))):
+                    xy_count += 1
+            is_numeric = False
+        elif is_numeric:
             try:
-                # Filter out None or non-numeric values
-                numeric_values = [float(v) for v in values if v is not None]
-                if numeric_values:
-                    total = sum(numeric_values)
-                    
-                    # Check if values are percentages (sum ≈ 100)
-                    if 95 <= total <= 105:
-                        return XL_CHART_TYPE.PIE, "category"
-                    
-                    # Check if all values are similar magnitude (good for pie)
-                    if numeric_values:
-                        max_val = max(numeric_values)
-                        min_val = min(numeric_values)
-                        # If largest value is less than 10x smallest, pie is still readable
-                        if min_val > 0 and max_val / min_val < 10:
-                            return XL_CHART_TYPE.PIE, "category"
+                v = float(v)
             except (TypeError, ValueError):
-                pass  # Non-numeric data, continue to other chart types
-
-        # Check for time series patterns in category names
-        time_related_terms = ["date", "time", "year", "month", "day", "quarter", "q1", "q2", "q3", "q4", 
-                             "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
-        
-        has_time_categories = False
-        if categories:
+                is_numeric = False  # Non-numeric data, pie chart is not an option
+                continue
+            total += v
+            if numeric_count == 0:
+                max_val = min_val = v
+            elif v > max_val:
+                max_val = v
+            elif v < min_val:
+                min_val = v
+            numeric_count += 1
+
+    # Check for XY scatter data (coordinates)
+    # The first value and every other non-empty value must be [x,y] pairs
+    is_xy_data = values[0] is not None and xy_count == value_count
+
+    # Check for pie chart conditions:
+    # 1. Single series
+    # 2. Few categories (<=8 for readability)
+    # 3. Values sum to approximately 100 (suggesting percentages), or
+    #    all values are similar magnitude: largest is less than 10x smallest, so pie is still readable
+    is_pie_data = (
+        series_count == 1 and 0 < category_count <= 8 and is_numeric and numeric_count > 0 and
+        (95 <= total <= 105 or (min_val > 0 and max_val / min_val < 10))
+    )
+
+    # Check for time series patterns in category names
+    # Skipped when XY or pie data was found, since those take precedence in the decision table
+    has_time_categories = False
+    if category_count and not (is_xy_data or is_pie_data):
+        if category_count > _BULK_SCAN_THRESHOLD:
+            # Search all labels in one pass; no term contains a newline, so matches can't span labels
+            labels = "\n".join(str(cat) for cat in categories if isinstance(cat, (str, int)))
+            has_time_categories = _TIME_RE.search(labels.lower()) is not None
+        else:
             has_time_categories = any(
-                isinstance(cat, (str, int)) and 
-                any(term in str(cat).lower() for term in time_related_terms)
-                for cat in categories
+                _is_time_label(str(cat))
+                for cat in categories if isinstance(cat, (str, int))
             )
-            
-            # For time series data, use line chart
-            if has_time_categories:
-                # For multiple series over time, use line chart
-                return XL_CHART_TYPE.LINE, "category"
-
-        # Data size-based decisions
-        if category_count > 0:
-            # Many categories with few series: use column chart
-            if category_count > 10 and series_count == 1:
-                return XL_CHART_TYPE.COLUMN_CLUSTERED, "category"
-                
-            # Many series with few categories: use bar chart (better label readability)
-            if series_count > 3 and category_count <= 10:
-                return XL_CHART_TYPE.BAR_CLUSTERED, "category"
-                
-            # Many categories with multiple series: use line chart (less visual clutter)
-            if category_count > 10 and series_count > 1:
-                return XL_CHART_TYPE.LINE, "category"
-        
-        # Default recommendations based on series count
-        if series_count > 1:
-            return XL_CHART_TYPE.BAR_CLUSTERED, "category"
-        else:
-            return XL_CHART_TYPE.COLUMN_CLUSTERED, "category"
-
-
-    def add_chart_to_slide(self, slide, chart_type: XL_CHART_TYPE, data: Dict[str, Any],
-                           chart_format: str = "category") -> chart:
-        """Add a chart to the slide with the specified data."""
-        # Position chart in the middle of the slide with margins
-        left = Inches(1)
-        top = Inches(2)
-        width = Inches(8)
-        height = Inches(5)
-
-        if chart_format == "category":
-            chart_data = CategoryChartData()
-            chart_data.categories = data.get("categories", [])
-
-            # Add each series
-            for series in data["series"]:
-                chart_data.add_series(series["name"], series["values"])
-
-        elif chart_format == "xy":
-            chart_data = XyChartData()
-
-            # Add each series
-            for series in data["series"]:
-                series_data = chart_data.add_series(series["name"])
-                for x, y in series["values"]:
-                    series_data.add_data_point(x, y)
-
-        # Add and configure the chart
-        graphic_frame = slide.shapes.add_chart(
-            chart_type, left, top, width, height, chart_data
-        )
-        chart = graphic_frame.chart
-
-        # Basic formatting
-        chart.has_legend = True
-        if len(data["series"]) > 1:
-            chart.legend.position = XL_LEGEND_POSITION.BOTTOM
-
-        # Add axis titles if provided
-        if "x_axis" in data:
-            chart.category_axis.axis_title.text_frame.text = data["x_axis"]
-        if "y_axis" in data:
-            chart.value_axis.axis_title.text_frame.text = data["y_axis"]
-
-        return chart
\ No newline at end of file
+
+    flags = (
+        (_XY if is_xy_data else 0) |
+        (_PIE if is_pie_data else 0) |
+        (_TIME if has_time_categories else 0) |
+        (_HAS_CATEGORIES if category_count > 0 else 0) |
+        (_MANY_CATEGORIES if category_count > 10 else 0) |
+        (_MULTI_SERIES if series_count > 1 else 0) |
+        (_MANY_SERIES if series_count > 3 else 0)
+    )
+    return _CHART_TYPE_TABLE[flags]
+
+
+def determine_chart_type(data: Dict[str, Any]) -> tuple[XL_CHART_TYPE, str]:
+    """
+    Analyze the data structure and determine the most appropriate chart type.
+    Uses heuristics based on data patterns to select the best visualization.
+
+    Args:
+        data: Dictionary containing chart data with keys for 'series', 'categories', etc.
+
+    Returns:
+        tuple: (PowerPoint chart type enum, chart_format string)
+    """
+    series = data["series"]
+
+    # Validate series data exists, stopping at the first series without values
+    if not series or any(not s.get("values") for s in series):
+        # Default to column chart if data is missing or incomplete
+        return XL_CHART_TYPE.COLUMN_CLUSTERED, "category"
+
+    categories = tuple(data.get("categories") or ())
+    # Only the first series is scanned, so only its values are normalized to plain tuples
+    # for the exact-type XY pair check
+    values = tuple(tuple(v) if isinstance(v, (list, tuple)) else v for v in series[0]["values"])
+    signature = (categories, len(series), values)
+
+    # The classification only depends on what the signature captures, so identical charts reuse the cached result
+    try:
+        return _classify_chart_data(*signature)
+    except TypeError:
+        # Unhashable values can't be cached, classify them directly
+        return _classify_chart_data.__wrapped__(*signature)
+
+
+def add_chart_to_slide(slide, chart_type: XL_CHART_TYPE, data: Dict[str, Any],
+                       chart_format: str = "category") -> chart:
+    """Add a chart to the slide with the specified data."""
+    # Position chart in the middle of the slide with margins
+    left = Inches(1)
+    top = Inches(2)
+    width = Inches(8)
+    height = Inches(5)
+    series = data["series"]
+
+    if chart_format == "category":
+        chart_data = CategoryChartData()
+        chart_data.categories = data.get("categories", [])
+
+        # Add each series
+        for s in series:
+            chart_data.add_series(s["name"], s["values"])
+
+    elif chart_format == "xy":
+        chart_data = XyChartData()
+
+        # Add each series
+        for s in series:
+            # python-pptx has no bulk API for XY points, so bind the method once per series
+            add_data_point = chart_data.add_series(s["name"]).add_data_point
+            for x, y in s["values"]:
+                add_data_point(x, y)
+
+    # Add and configure the chart
+    graphic_frame = slide.shapes.add_chart(
+        chart_type, left, top, width, height, chart_data
+    )
+    chart = graphic_frame.chart
+
+    # Basic formatting
+    chart.has_legend = True
+    if len(series) > 1:
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+
+    # Add axis titles if provided
+    if "x_axis" in data:
+        chart.category_axis.axis_title.text_frame.text = data["x_axis"]
+    if "y_axis" in data:
+        chart.value_axis.axis_title.text_frame.text = data["y_axis"]
+
+    return chart
\ No newline at end of file
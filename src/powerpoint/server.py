@@ -7,7 +7,7 @@ import asyncio
 from pptx import Presentation
 import logging
 from .presentation_manager import PresentationManager
-from .chart_manager import ChartManager
+from . import chart_manager
 from .vision_manager import VisionManager
 
 logger = logging.getLogger('mcp_powerpoint_server')
@@ -32,7 +32,6 @@ def sanitize_path(base_path: str, file_name: str) -> str:
 async def main(folder_path):
     logger.info(f"Starting Powerpoint MCP Server")
     presentation_manager = PresentationManager()
-    chart_manager = ChartManager()
     vision_manager = VisionManager()
     server = Server("powerpoint-server")
     logger.debug("Registering Handlers")
@@ -679,20 +678,24 @@ async def main(folder_path):
         else:
             raise ValueError(f"Unknown tool: {name}")
 
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        logger.info("Server running with stdio transport")
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="powerpoint",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            logger.info("Server running with stdio transport")
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="powerpoint",
+                    server_version="0.1.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        # Release pooled HTTP connections held by the vision manager
+        await vision_manager.aclose()
 
 
 if __name__ == "__main__":
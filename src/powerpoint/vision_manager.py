@@ -1,15 +1,89 @@
 import os
+import uuid
+import shutil
+import hashlib
 import logging
 import aiohttp
 import asyncio
 
 from PIL import Image
 from io import BytesIO
+from typing import Optional, Union
 from openai import AsyncOpenAI
 
 logger = logging.getLogger('vision_manager')
 
+# File extensions that can take the raw bytes of each image content type without conversion
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": (".png",),
+    "image/jpeg": (".jpg", ".jpeg"),
+    "image/gif": (".gif",),
+    "image/webp": (".webp",),
+}
+
+# Enough leading bytes to recognize any of the formats above by their magic bytes
+SNIFF_SIZE = 12
+
+# Read buffer and write chunk size for downloads; a ~1 MB image arrives in a handful of reads
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+DOWNLOAD_TIMEOUT_SECONDS = 60
+
+# Encoder settings favouring speed over file size when an image has to be converted
+_JPEG_SAVE_OPTIONS = {"format": "JPEG", "quality": 90, "optimize": False, "progressive": False, "subsampling": 2}
+SAVE_OPTIONS = {
+    ".jpg": _JPEG_SAVE_OPTIONS,
+    ".jpeg": _JPEG_SAVE_OPTIONS,
+    ".png": {"format": "PNG", "compress_level": 1},
+}
+
+IMAGE_SIZE = "1024x1024"
+
+# Retries for rate limited (429), server error (5xx) and connection failures, with exponential backoff
+OPENAI_MAX_RETRIES = 5
+
 class VisionManager:
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Optional folder where generated images are kept, so repeated
+                prompts are copied from disk instead of being generated again
+        """
+        self.cache_dir = cache_dir
+
+        # Created lazily on first use and reused so connections stay pooled between requests
+        self._client: Optional[AsyncOpenAI] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Cache-backed generations in progress, keyed by cache path
+        self._pending_generations: dict[str, asyncio.Future] = {}
+
+    def _get_client(self, api_key: str) -> AsyncOpenAI:
+        """Return the shared AsyncOpenAI client, creating it on first use."""
+        if self._client is None:
+            logger.debug("Creating AsyncOpenAI client")
+            self._client = AsyncOpenAI(api_key=api_key, max_retries=OPENAI_MAX_RETRIES)
+        return self._client
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use or after it was closed."""
+        if self._session is None or self._session.closed:
+            logger.debug("Creating aiohttp client session")
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300),
+                read_bufsize=DOWNLOAD_CHUNK_SIZE,
+                timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT_SECONDS)
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP session and OpenAI client."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
 
     async def generate_and_save_image(self, prompt: str, output_path: str) -> str:
         """
@@ -26,35 +100,159 @@ class VisionManager:
             ValueError: If API key is missing or any step in the process fails
         """
         logger.info(f"Generating image for prompt: '{prompt[:50]}...' (truncated)")
-        
+
+        # Reuse a previously generated image for the same prompt
+        cache_path = self._cache_path(prompt)
+        if cache_path and os.path.exists(cache_path):
+            logger.info(f"Using cached image: {cache_path}")
+            return self._save_cached_image(cache_path, output_path)
+
         # Validate API key
         api_key = os.environ.get('OPENAI_API_KEY')
         if not api_key:
             logger.error("OPENAI_API_KEY environment variable not set")
             raise ValueError("OPENAI_API_KEY environment variable not set.")
 
-        # Create AsyncOpenAI client
-        client = AsyncOpenAI(api_key=api_key)
+        # Get the shared AsyncOpenAI client
+        client = self._get_client(api_key)
+
+        if not cache_path:
+            # Download and save the image from the generated URL
+            image_url = await self._generate_image_url(client, prompt)
+            return await self._download_and_save_image_from_url(image_url, output_path)
+
+        # Share one generation between concurrent calls for the same prompt, so a batch
+        # with repeated prompts only pays for each image once
+        task = self._pending_generations.get(cache_path)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_into_cache(client, prompt, cache_path))
+            self._pending_generations[cache_path] = task
+            task.add_done_callback(lambda _: self._pending_generations.pop(cache_path, None))
+        else:
+            logger.info(f"Waiting for in-flight generation of the same prompt: {cache_path}")
+
+        # Shielded so a cancelled caller doesn't cancel the generation other callers are waiting on
+        await asyncio.shield(task)
+        return self._save_cached_image(cache_path, output_path)
+
+    async def _generate_image_url(self, client: AsyncOpenAI, prompt: str) -> str:
+        """
+        Private method to generate an image with DALL-E 3 and return its URL.
+
+        Args:
+            client: OpenAI client to send the request with
+            prompt: Text description of the image to generate
+
+        Returns:
+            The URL of the generated image
 
+        Raises:
+            ValueError: If the generation request fails
+        """
         try:
             # Generate the image using DALL-E 3
             logger.debug("Sending request to OpenAI API")
             response = await client.images.generate(
                 prompt=prompt,
                 n=1,
-                size="1024x1024"
+                size=IMAGE_SIZE
             )
-            
+
             image_url = response.data[0].url
             logger.debug(f"Image generated successfully, URL received")
-            
+
         except Exception as e:
             logger.error(f"Failed to generate image: {str(e)}")
             raise ValueError(f"Failed to generate image: {str(e)}")
 
-        # Download and save the image from the generated URL
-        return await self._download_and_save_image_from_url(image_url, output_path)
-    
+        return image_url
+
+    async def _generate_into_cache(self, client: AsyncOpenAI, prompt: str, cache_path: str) -> None:
+        """
+        Private method to generate an image and store it in the cache as PNG.
+
+        Args:
+            client: OpenAI client to send the request with
+            prompt: Text description of the image to generate
+            cache_path: Cache file for the prompt
+
+        Raises:
+            ValueError: If generating, downloading or storing the image fails
+        """
+        image_url = await self._generate_image_url(client, prompt)
+
+        # Download into the cache under a unique name and move it into place in one step,
+        # so other processes sharing the cache never read a partially written image
+        temp_path = f"{cache_path}.{uuid.uuid4().hex}.png"
+        try:
+            await self._download_and_save_image_from_url(image_url, temp_path)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.error(f"Failed to store image in cache: {str(e)}")
+            raise ValueError(f"Failed to save image to {cache_path}: {str(e)}")
+        finally:
+            self._remove_partial_file(temp_path)
+
+    def generate_and_save_image_sync(self, prompt: str, output_path: str) -> str:
+        """
+        Blocking wrapper around generate_and_save_image for callers without an event loop.
+        Callers already inside an event loop should await generate_and_save_image directly.
+
+        Args:
+            prompt: Text description of the image to generate
+            output_path: Path where the generated image should be saved
+
+        Returns:
+            The path to the saved image
+
+        Raises:
+            ValueError: If API key is missing or any step in the process fails
+            RuntimeError: If called while an event loop is running in this thread
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass  # No running loop, so asyncio.run can start one
+        else:
+            raise RuntimeError("generate_and_save_image_sync can't be called from a running event loop; "
+                               "use 'await generate_and_save_image(...)' instead.")
+
+        async def generate() -> str:
+            # A separate manager owns connections bound to this temporary event loop,
+            # leaving this instance's pooled client and session for the loop that created them
+            manager = VisionManager(cache_dir=self.cache_dir)
+            try:
+                return await manager.generate_and_save_image(prompt, output_path)
+            finally:
+                await manager.aclose()
+
+        return asyncio.run(generate())
+
+    async def generate_and_save_images(self, jobs: list[tuple[str, str]],
+                                       concurrency: int = 8) -> list[Union[str, BaseException]]:
+        """
+        Generate several images concurrently and save each to its own path.
+
+        Args:
+            jobs: List of (prompt, output_path) pairs
+            concurrency: Maximum number of images generated at the same time
+
+        Returns:
+            One entry per job, in order: the path to the saved image, or the exception
+            raised for that job so one failure doesn't cancel the others
+        """
+        logger.info(f"Generating {len(jobs)} images with concurrency {concurrency}")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(prompt: str, output_path: str) -> str:
+            async with semaphore:
+                return await self.generate_and_save_image(prompt, output_path)
+
+        return await asyncio.gather(
+            *(generate(prompt, output_path) for prompt, output_path in jobs),
+            return_exceptions=True
+        )
+
     async def download_and_save_image(self, image_url: str, output_path: str) -> str:
         """
         Download an image from a given URL and save it to the specified path.
@@ -88,35 +286,59 @@ class VisionManager:
         Raises:
             ValueError: If any step in the download or save process fails
         """
+        extension = os.path.splitext(output_path)[1].lower()
+
         # Download the image asynchronously
         try:
-            async with aiohttp.ClientSession() as session:
-                logger.debug(f"Downloading image from URL")
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        error_msg = f"Failed to download image: HTTP {response.status}"
-                        logger.error(error_msg)
-                        raise ValueError(error_msg)
-                    
-                    image_data = await response.read()
-                    logger.debug(f"Image downloaded successfully: {len(image_data)} bytes")
-                    
+            session = self._get_session()
+            logger.debug(f"Downloading image from URL")
+            async with session.get(image_url) as response:
+                if response.status != 200:
+                    error_msg = f"Failed to download image: HTTP {response.status}"
+                    logger.error(error_msg)
+                    raise ValueError(error_msg)
+
+                # Stream the body straight to disk when it is already in the requested format.
+                # The header alone can't be trusted for user supplied URLs, so the leading bytes
+                # must confirm it; anything else goes through the buffered path and PIL below
+                head = b""
+                if extension in CONTENT_TYPE_EXTENSIONS.get(response.content_type, ()):
+                    while len(head) < SNIFF_SIZE:
+                        chunk = await response.content.readany()
+                        if not chunk:
+                            break
+                        head += chunk
+                    if extension in CONTENT_TYPE_EXTENSIONS.get(self._sniff_content_type(head), ()):
+                        await self._stream_image_to_file(response, output_path, head)
+                        return output_path
+
+                image_data = head + await response.content.read()
+                logger.debug(f"Image downloaded successfully: {len(image_data)} bytes")
+
         except aiohttp.ClientError as e:
             logger.error(f"Network error downloading image: {str(e)}")
             raise ValueError(f"Network error downloading image: {str(e)}")
+        except asyncio.TimeoutError:
+            error_msg = f"Timed out downloading image after {DOWNLOAD_TIMEOUT_SECONDS}s"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
 
         # Save the image
         try:
-            # Ensure the save directory exists
-            directory = os.path.dirname(output_path)
-            if directory:
-                logger.debug(f"Creating directory if needed: {directory}")
-                os.makedirs(directory, exist_ok=True)
-                
-            # Process and save the image
-            logger.debug(f"Processing and saving image to: {output_path}")
-            image = Image.open(BytesIO(image_data))
-            image.save(output_path)
+            self._ensure_directory(output_path)
+
+            # Servers don't always send an accurate content type, so check the bytes themselves
+            # and skip decoding and re-encoding when they are already in the requested format
+            content_type = self._sniff_content_type(image_data)
+            if extension in CONTENT_TYPE_EXTENSIONS.get(content_type, ()):
+                logger.debug(f"Image is already {content_type}, writing it to: {output_path}")
+                with open(output_path, "wb") as file:
+                    file.write(image_data)
+            else:
+                # Process and save the image
+                logger.debug(f"Processing and saving image to: {output_path}")
+                image = Image.open(BytesIO(image_data))
+                image.save(output_path, **SAVE_OPTIONS.get(extension, {}))
             logger.info(f"Image successfully saved to: {output_path}")
             
         except OSError as e:
@@ -126,4 +348,107 @@ class VisionManager:
             logger.error(f"Unexpected error saving image: {str(e)}")
             raise ValueError(f"Error processing image: {str(e)}")
 
-        return output_path
\ No newline at end of file
+        return output_path
+
+    async def _stream_image_to_file(self, response: aiohttp.ClientResponse, output_path: str,
+                                    head: bytes = b"") -> None:
+        """
+        Private method to write a response body to disk chunk by chunk, without decoding it.
+
+        Args:
+            response: Open response whose body is already in the target image format
+            output_path: Path where the image should be saved
+            head: Leading bytes of the body already read from the response
+
+        Raises:
+            ValueError: If the file can't be written
+            aiohttp.ClientError: If the download fails part way through
+        """
+        logger.debug(f"Streaming image to: {output_path}")
+
+        # Write to a unique file beside the target and move it into place once complete,
+        # so a failed download never clobbers or deletes an existing file at output_path
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.part"
+        try:
+            self._ensure_directory(output_path)
+            size = len(head)
+            with open(temp_path, "wb") as file:
+                file.write(head)
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    size += len(chunk)
+            os.replace(temp_path, output_path)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            raise  # Network failures and timeouts (both can be OSErrors) are reported by the caller
+        except OSError as e:
+            logger.error(f"Failed to create directory or save image: {str(e)}")
+            raise ValueError(f"Failed to save image to {output_path}: {str(e)}")
+        finally:
+            self._remove_partial_file(temp_path)
+
+        logger.info(f"Image successfully saved to: {output_path} ({size} bytes)")
+
+    def _cache_path(self, prompt: str) -> Optional[str]:
+        """Return the cache file for a prompt, or None if caching is disabled."""
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(f"{IMAGE_SIZE}\n{prompt}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _save_cached_image(self, cache_path: str, output_path: str) -> str:
+        """
+        Private method to save a cached PNG image to the output path, converting it only if needed.
+
+        Args:
+            cache_path: Path of the cached image
+            output_path: Path where the image should be saved
+
+        Returns:
+            The path to the saved image
+
+        Raises:
+            ValueError: If the image can't be saved
+        """
+        try:
+            self._ensure_directory(output_path)
+            extension = os.path.splitext(output_path)[1].lower()
+            if extension == ".png":
+                shutil.copyfile(cache_path, output_path)
+            else:
+                with Image.open(cache_path) as image:
+                    image.save(output_path, **SAVE_OPTIONS.get(extension, {}))
+            logger.info(f"Image successfully saved to: {output_path}")
+        except OSError as e:
+            logger.error(f"Failed to save cached image: {str(e)}")
+            raise ValueError(f"Failed to save image to {output_path}: {str(e)}")
+
+        return output_path
+
+    @staticmethod
+    def _sniff_content_type(image_data: bytes) -> Optional[str]:
+        """Identify the image content type from its leading magic bytes, or None if unrecognized."""
+        if image_data.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "image/png"
+        if image_data.startswith(b"\xff\xd8\xff"):
+            return "image/jpeg"
+        if image_data.startswith((b"GIF87a", b"GIF89a")):
+            return "image/gif"
+        if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+            return "image/webp"
+        return None
+
+    @staticmethod
+    def _ensure_directory(output_path: str) -> None:
+        """Create the parent directory of output_path if it doesn't exist."""
+        directory = os.path.dirname(output_path)
+        if directory:
+            logger.debug(f"Creating directory if needed: {directory}")
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _remove_partial_file(output_path: str) -> None:
+        """Delete a partially written file, ignoring errors."""
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass